@@ -1,4 +1,6 @@
 import os
+import asyncio
+import logging
 from src.ai_engine import ResumeOptimizer
 from src.document_processor import DocumentProcessor
 from src.interface import create_interface
@@ -11,6 +13,7 @@ def main():
     1. Initializes all components
     2. Creates the web interface
     3. Starts the server
+    4. Releases the OpenAI connection pool and worker processes on shutdown
     """
     # Ensure the templates directory exists
     os.makedirs("templates", exist_ok=True)
@@ -21,11 +24,24 @@ def main():
     
     # Create and launch interface
     interface = create_interface(optimizer, processor)
-    interface.launch(
-        share=True,
-        server_name="0.0.0.0",
-        server_port=7860
-    )
+    
+    # Gradio runs one event at a time by default, which would serialize the
+    # async handler and its threaded PDF rendering across all users
+    interface.queue(default_concurrency_limit=max(1, int(os.getenv('APP_CONCURRENCY', '8'))))
+    try:
+        interface.launch(
+            share=True,
+            server_name="0.0.0.0",
+            server_port=7860
+        )
+    finally:
+        processor.close()
+        # Best effort: the pooled connections were opened on Gradio's event loop,
+        # which has already stopped, so closing them here may fail
+        try:
+            asyncio.run(optimizer.aclose())
+        except Exception:
+            logging.getLogger(__name__).warning("Could not cleanly close OpenAI connections", exc_info=True)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,8 +1,85 @@
 import os
+import re
+import json
+import random
+import asyncio
+import hashlib
+import httpx
+from diskcache import Cache
 from string import Template
-from typing import Dict, List
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
 from dotenv import load_dotenv
+from .profiling import profiled
+
+CACHE_EXPIRY_SECONDS = 7 * 86400
+
+SECTION_HEADER_RE = re.compile(r'^[ \t]*#(?P<name>.*)$', re.MULTILINE)
+
+# Minimum number of new characters before a streamed preview is re-rendered
+PREVIEW_INTERVAL = 200
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+def _to_markdown(value, indent: str = '') -> str:
+    """Render a JSON value from the model as markdown; strings pass through unchanged"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        if any(isinstance(item, dict) for item in value):
+            return '\n\n'.join(_to_markdown(item, indent) for item in value)
+        lines = []
+        for item in value:
+            if isinstance(item, list):
+                lines.append(_to_markdown(item, indent + '  '))
+            else:
+                lines.append(f"{indent}- {_to_markdown(item)}")
+        return '\n'.join(lines)
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            label = str(key).replace('_', ' ').title()
+            if isinstance(item, (dict, list)):
+                lines.append(f"{indent}**{label}:**\n{_to_markdown(item, indent)}")
+            else:
+                lines.append(f"{indent}**{label}:** {_to_markdown(item)}  ")
+        return '\n'.join(lines)
+    return str(value)
+
+def _normalize_sections(data: Dict) -> Dict[str, str]:
+    """Map a parsed JSON resume to lowercase section names and markdown content"""
+    return {str(name).lower(): _to_markdown(content) for name, content in data.items()}
+
+def _parse_partial_json(text: str) -> Optional[Dict[str, str]]:
+    """Best-effort parse of a JSON resume object that is still being streamed"""
+    for suffix in ('', '"}', '}'):
+        try:
+            data = json.loads(text + suffix)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            return _normalize_sections(data)
+    return None
+
+def _to_format_string(template: Template) -> str:
+    """Convert a string.Template into an equivalent str.format_map pattern"""
+    source = template.template
+    parts = []
+    position = 0
+    for match in template.pattern.finditer(source):
+        parts.append(source[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        name = match.group('named') or match.group('braced')
+        if name:
+            parts.append('{' + name + '}')
+        elif match.group('escaped') is not None:
+            parts.append('$')
+        else:
+            raise ValueError(f"Invalid placeholder in template at index {match.start()}")
+        position = match.end()
+    parts.append(source[position:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts)
 
 class PromptTemplates:
     CONTENT_TRANSFORMATION = Template('''
@@ -24,65 +101,229 @@ class PromptTemplates:
     Important requirements:
     - Preserve truthful information from the original resume
     - Include all relevant experience from the original resume
-    - Format in clear, ATS-friendly markdown
+    - Format the content of each section in clear, ATS-friendly markdown
     - Use strong action verbs and quantifiable achievements
     - Maintain professional formatting
     
-    Generate the complete resume in markdown format.
+    Return the complete resume as a JSON object mapping lowercase section names
+    to their markdown content (without the section heading), for example:
+    {"summary": "...", "experience": "...", "skills": "...", "education": "..."}
+    Every value must be a single markdown string; do not use nested objects or
+    arrays. Add a key for every other section present in the original resume,
+    and put the candidate's name and contact details under "contact".
     ''')
     
-    EXPERIENCE_TAILORING = Template('''
-    Rewrite these experience entries to align with the target job requirements:
-    
-    ORIGINAL EXPERIENCE:
-    $experience_entries
-    
-    JOB REQUIREMENTS:
-    $requirements
-    
-    For each entry:
-    1. Emphasize relevant skills and achievements
-    2. Use terminology from the job description
-    3. Quantify impacts where possible
-    4. Start with strong action verbs
-    5. Maintain factual accuracy
-    
-    Return the tailored experience entries in markdown format.
-    ''')
+    # Precompiled for str.format_map, which is much cheaper than
+    # Template.substitute when building many prompts (e.g. for batches)
+    CONTENT_TRANSFORMATION_FMT = _to_format_string(CONTENT_TRANSFORMATION)
 
 class ResumeOptimizer:
     def __init__(self):
         """Initialize the optimizer with necessary configurations"""
         load_dotenv()
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # One pooled HTTP client keeps connections alive across requests
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            timeout=60.0
+        )
+        # Retries are handled by _create, so the SDK's own retries are disabled
+        self.client = AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            http_client=self.http_client,
+            max_retries=0
+        )
         self.templates = PromptTemplates()
+        self.max_attempts = max(1, int(os.getenv('OAI_MAX_ATTEMPTS', '3')))
+        self.concurrency = max(1, int(os.getenv('OAI_CONCURRENCY', '8')))
+        # Created lazily so it binds to the serving event loop (Python 3.9 binds at construction)
+        self._sem: Optional[asyncio.Semaphore] = None
+        # The cache stores prompts and responses, i.e. resumes; an empty OAI_CACHE_DIR disables it
+        cache_dir = os.getenv('OAI_CACHE_DIR', './.oai_cache')
+        self.cache: Optional[Cache] = Cache(cache_dir) if cache_dir else None
+        
+    async def aclose(self):
+        """Close the underlying HTTP connection pool and the response cache"""
+        try:
+            await self.client.close()
+        finally:
+            if self.cache is not None:
+                self.cache.close()
         
-    def get_completion(self, prompt: str, model: str = "gpt-4", temperature: float = 0.7) -> str:
+    async def get_completion(
+        self,
+        prompt: str,
+        model: str = "gpt-4o",
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> str:
         """
         Get AI completion from OpenAI.
         
+        At most OAI_CONCURRENCY requests are in flight at once. Rate limits,
+        timeouts, connection errors and 5xx responses are retried with
+        exponential backoff, up to OAI_MAX_ATTEMPTS attempts in total.
+        Unless OAI_CACHE_DIR is empty, responses are cached on disk for a week,
+        keyed by model, temperature, response format and prompt, so identical
+        repeated requests return immediately.
+        
         Parameters:
             prompt (str): Formatted prompt text
             model (str): GPT model to use
             temperature (float): Controls response creativity
+            response_format (Dict[str, str], optional): OpenAI response format, e.g. {"type": "json_object"}
             
         Returns:
             str: The AI-generated response
+            
+        Raises:
+            RuntimeError: If the response was cut off at the length limit
         """
-        messages = [{"role": "user", "content": prompt}]
+        key = self._cache_key(prompt, model, temperature, response_format)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return cached
         
-        response = self.client.chat.completions.create(
+        response = await self._create(
             model=model,
-            messages=messages,
-            temperature=temperature
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            **({"response_format": response_format} if response_format else {})
         )
         
-        return response.choices[0].message.content
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise RuntimeError("The AI response was cut off at the length limit")
+        
+        content = choice.message.content
+        if self._is_cacheable(content, response_format):
+            await self._cache_set(key, content)
+        return content
+    
+    async def stream_completion(
+        self,
+        prompt: str,
+        model: str = "gpt-4o",
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream an AI completion from OpenAI as it is generated.
+        
+        Each stream holds one OAI_CONCURRENCY slot until it finishes. Transient
+        errors are retried like get_completion, but only before the first chunk
+        arrives; a failure mid-stream is raised. A cached response is yielded as
+        a single chunk.
+        
+        Parameters:
+            prompt (str): Formatted prompt text
+            model (str): GPT model to use
+            temperature (float): Controls response creativity
+            response_format (Dict[str, str], optional): OpenAI response format, e.g. {"type": "json_object"}
+            
+        Yields:
+            str: Successive pieces of the AI-generated response
+            
+        Raises:
+            RuntimeError: If the response was cut off at the length limit
+        """
+        key = self._cache_key(prompt, model, temperature, response_format)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        finish_reason = None
+        for attempt in range(self.max_attempts):
+            try:
+                # Hold a slot for the whole stream, not just until the response starts
+                async with self._semaphore():
+                    stream = await self.client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        stream=True,
+                        **({"response_format": response_format} if response_format else {})
+                    )
+                    try:
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            finish_reason = chunk.choices[0].finish_reason or finish_reason
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                parts.append(delta)
+                                yield delta
+                    finally:
+                        # Release the pooled connection even if the consumer stops early
+                        await stream.close()
+                break
+            except (*RETRYABLE_ERRORS, httpx.TransportError):
+                # Output already yielded cannot be taken back, so only retry before the first chunk
+                if parts or attempt == self.max_attempts - 1:
+                    raise
+            await asyncio.sleep(min(2 ** attempt, 30) + random.random())
+        
+        if finish_reason == "length":
+            raise RuntimeError("The AI response was cut off at the length limit")
+        
+        content = ''.join(parts)
+        if self._is_cacheable(content, response_format):
+            await self._cache_set(key, content)
+    
+    def _cache_key(self, prompt: str, model: str, temperature: float, response_format: Optional[Dict[str, str]]) -> str:
+        """Build the response cache key for a completion request"""
+        return hashlib.sha256(
+            f"{model}\0{temperature}\0{json.dumps(response_format)}\0{prompt}".encode('utf-8')
+        ).hexdigest()
+    
+    async def _cache_get(self, key: str) -> Optional[str]:
+        """Look up a cached response off the event loop; None if missing or caching is disabled"""
+        if self.cache is None:
+            return None
+        return await asyncio.to_thread(self.cache.get, key)
+    
+    async def _cache_set(self, key: str, content: str):
+        """Store a response off the event loop, unless caching is disabled"""
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, content, expire=CACHE_EXPIRY_SECONDS)
+    
+    def _is_cacheable(self, content: Optional[str], response_format: Optional[Dict[str, str]]) -> bool:
+        """Only cache non-empty responses, and JSON responses only if they parse"""
+        if not content:
+            return False
+        if response_format and response_format.get("type") == "json_object":
+            try:
+                json.loads(content)
+            except json.JSONDecodeError:
+                return False
+        return True
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Return the request-limiting semaphore, creating it inside the running loop"""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+    
+    async def _create(self, **kwargs):
+        """Create a chat completion, retrying transient errors with exponential backoff"""
+        for attempt in range(self.max_attempts):
+            try:
+                async with self._semaphore():
+                    return await self.client.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS:
+                if attempt == self.max_attempts - 1:
+                    raise
+                await asyncio.sleep(min(2 ** attempt, 30) + random.random())
     
-    def generate_tailored_resume(self, resume_text: str, job_description: str, temperature: float = 0.4) -> str:
+    @profiled
+    async def generate_tailored_resume(self, resume_text: str, job_description: str, temperature: float = 0.4) -> str:
         """
         Generate a completely tailored resume for the target job.
         
+        The model returns every section in a single structured JSON response,
+        so the whole resume is tailored in one request.
+        
         Parameters:
             resume_text (str): The original resume text
             job_description (str): The target job description
@@ -92,119 +333,291 @@ class ResumeOptimizer:
             str: The tailored resume in markdown format
         """
         # Generate the tailored resume content
-        generation_prompt = self.templates.CONTENT_TRANSFORMATION.substitute(
-            resume_text=resume_text,
-            job_description=job_description
-        )
+        generation_prompt = self.templates.CONTENT_TRANSFORMATION_FMT.format_map({
+            'resume_text': resume_text,
+            'job_description': job_description
+        })
         
         # Get the AI to create the tailored resume
-        tailored_resume = self.get_completion(
+        tailored_resume = await self.get_completion(
             generation_prompt,
-            temperature=temperature
+            temperature=temperature,
+            response_format={"type": "json_object"}
         )
         
-        # Enhance specific sections
-        sections = self.extract_sections(tailored_resume)
-        enhanced_sections = self.enhance_sections(sections, job_description)
-        
         # Combine into final resume
-        return self.combine_sections(enhanced_sections)
+        return self.combine_sections(self.parse_sections(tailored_resume))
     
-    def extract_sections(self, resume_text: str) -> Dict[str, str]:
+    @profiled
+    async def stream_tailored_resume(
+        self,
+        resume_text: str,
+        job_description: str,
+        temperature: float = 0.4
+    ) -> AsyncIterator[str]:
         """
-        Extract different sections from the resume text.
+        Generate a tailored resume, yielding partial previews while it streams.
         
         Parameters:
-            resume_text (str): The full resume text
+            resume_text (str): The original resume text
+            job_description (str): The target job description
+            temperature (float): Controls output creativity
+            
+        Yields:
+            str: Markdown previews of the resume so far; the last one is final
+        """
+        generation_prompt = self.templates.CONTENT_TRANSFORMATION_FMT.format_map({
+            'resume_text': resume_text,
+            'job_description': job_description
+        })
+        
+        tailored_resume = ''
+        rendered_length = 0
+        async for delta in self.stream_completion(
+            generation_prompt,
+            temperature=temperature,
+            response_format={"type": "json_object"}
+        ):
+            tailored_resume += delta
+            if len(tailored_resume) - rendered_length < PREVIEW_INTERVAL:
+                continue
+            sections = _parse_partial_json(tailored_resume)
+            if sections:
+                rendered_length = len(tailored_resume)
+                yield self.combine_sections(sections)
+        
+        yield self.combine_sections(self.parse_sections(tailored_resume))
+    
+    async def submit_batch(self, jobs: List[Tuple[str, str]], model: str = "gpt-4o", temperature: float = 0.4) -> str:
+        """
+        Submit several resume tailoring jobs through the OpenAI Batch API.
+        
+        Batch jobs are cheaper than interactive requests but complete
+        asynchronously (within 24h), so they suit bulk, non-interactive use.
+        
+        Parameters:
+            jobs (List[Tuple[str, str]]): Pairs of (resume_text, job_description)
+            model (str): GPT model to use
+            temperature (float): Controls output creativity
             
         Returns:
-            Dict[str, str]: Dictionary of section names and their content
+            str: ID of the created batch
         """
-        sections = {}
-        current_section = "General"
-        current_content = []
-        
-        for line in resume_text.split('\n'):
-            if line.strip().startswith('#'):  # Markdown headers indicate sections
-                if current_content:
-                    sections[current_section.lower()] = '\n'.join(current_content)
-                current_section = line.strip('#').strip()
-                current_content = []
-            else:
-                current_content.append(line)
+        if not jobs:
+            raise ValueError("At least one job is required to submit a batch")
+        
+        requests = []
+        for index, (resume_text, job_description) in enumerate(jobs):
+            prompt = self.templates.CONTENT_TRANSFORMATION_FMT.format_map({
+                'resume_text': resume_text,
+                'job_description': job_description
+            })
+            requests.append(json.dumps({
+                "custom_id": f"job-{index}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": temperature,
+                    "response_format": {"type": "json_object"}
+                }
+            }))
         
-        # Add the last section
-        if current_content:
-            sections[current_section.lower()] = '\n'.join(current_content)
+        batch_file = await self.client.files.create(
+            file=("batch_input.jsonl", '\n'.join(requests).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        return batch.id
+    
+    async def get_batch_results(self, batch_id: str) -> Tuple[str, Optional[List[str]]]:
+        """
+        Check a batch once and collect its results if it has finished.
+        
+        Parameters:
+            batch_id (str): ID returned by submit_batch
             
-        return sections
+        Returns:
+            Tuple[str, Optional[List[str]]]: The batch status, and the tailored
+            resumes in the order the jobs were submitted once it has completed
+            (None while it is still running)
+            
+        Raises:
+            RuntimeError: If the batch did not complete or any of its jobs failed
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return batch.status, None
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended with status: {batch.status}")
+        
+        results = {}
+        errors = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            output = await self.client.files.content(file_id)
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+                error = record.get("error") or body.get("error")
+                if error or response.get("status_code", 200) != 200:
+                    errors[record["custom_id"]] = (error or {}).get("message") or f"HTTP {response.get('status_code')}"
+                    continue
+                choices = body.get("choices") or [{}]
+                if choices[0].get("finish_reason") == "length":
+                    errors[record["custom_id"]] = "response cut off at the length limit"
+                    continue
+                content = choices[0].get("message", {}).get("content")
+                if content:
+                    results[record["custom_id"]] = self.combine_sections(self.parse_sections(content))
+                else:
+                    errors[record["custom_id"]] = "empty response"
+        
+        total = batch.request_counts.total if batch.request_counts else len(results) + len(errors)
+        for index in range(total):
+            if f"job-{index}" not in results:
+                errors.setdefault(f"job-{index}", "no result returned")
+        if errors:
+            details = '; '.join(f"{job_id}: {message}" for job_id, message in sorted(errors.items()))
+            raise RuntimeError(f"{len(errors)} of {total} jobs in batch {batch_id} failed: {details}")
+        
+        return batch.status, [results[f"job-{index}"] for index in range(total)]
     
-    def enhance_sections(self, sections: Dict[str, str], job_description: str) -> Dict[str, str]:
+    async def poll_batch(
+        self,
+        batch_id: str,
+        initial_delay: float = 5.0,
+        max_delay: float = 300.0,
+        timeout: float = 3600.0
+    ) -> List[str]:
         """
-        Further enhance each section of the generated resume.
+        Wait for a batch to finish and collect its results.
+        
+        The status is polled with exponential backoff, starting at
+        initial_delay seconds and doubling up to max_delay. Batches can take
+        up to 24 hours, so interactive callers should use get_batch_results
+        instead of waiting here.
         
         Parameters:
-            sections (Dict[str, str]): Original sections
-            job_description (str): Target job description
+            batch_id (str): ID returned by submit_batch
+            initial_delay (float): First wait between polls, in seconds
+            max_delay (float): Upper bound for the wait between polls
+            timeout (float): Give up after this many seconds
             
         Returns:
-            Dict[str, str]: Enhanced sections
+            List[str]: The tailored resumes, in the order the jobs were submitted
+            
+        Raises:
+            RuntimeError: If the batch did not complete or any of its jobs failed
+            TimeoutError: If the batch is still running after timeout seconds
         """
-        enhanced = {}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = initial_delay
         
-        for section_name, content in sections.items():
-            if 'experience' in section_name.lower():
-                enhanced[section_name] = self.enhance_experience(content, job_description)
-            else:
-                enhanced[section_name] = content
-                
-        return enhanced
+        while True:
+            status, results = await self.get_batch_results(batch_id)
+            if results is not None:
+                return results
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"Batch {batch_id} still {status} after {timeout:.0f} seconds")
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
     
-    def enhance_experience(self, experience_content: str, job_description: str) -> str:
+    def parse_sections(self, response: str) -> Dict[str, str]:
         """
-        Enhance experience entries to better match job requirements.
+        Parse the structured JSON resume returned by the model.
+        
+        Falls back to splitting on markdown headers if the response is not
+        a JSON object. Nested objects or arrays the model returns despite the
+        prompt are rendered to markdown rather than Python reprs.
         
         Parameters:
-            experience_content (str): Original experience content
-            job_description (str): Target job description
+            response (str): Raw model response
             
         Returns:
-            str: Enhanced experience content
+            Dict[str, str]: Dictionary of section names and their content
         """
-        prompt = self.templates.EXPERIENCE_TAILORING.substitute(
-            experience_entries=experience_content,
-            requirements=job_description
-        )
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            return self.extract_sections(response)
+        if not isinstance(data, dict):
+            return self.extract_sections(response)
         
-        return self.get_completion(prompt, temperature=0.3)
+        return _normalize_sections(data)
+    
+    def extract_sections(self, resume_text: str) -> Dict[str, str]:
+        """
+        Extract different sections from the resume text.
+        
+        Parameters:
+            resume_text (str): The full resume text
+            
+        Returns:
+            Dict[str, str]: Dictionary of section names and their content
+        """
+        sections = {}
+        current_section = "General"
+        content_start = 0
+        
+        # Markdown headers indicate sections; slice the text between them
+        for match in SECTION_HEADER_RE.finditer(resume_text):
+            content = resume_text[content_start:match.start()]
+            if content:
+                sections[current_section.lower()] = content[:-1] if content.endswith('\n') else content
+            current_section = match.group('name').strip('#').strip()
+            content_start = match.end() + 1
+        
+        # Add the last section; a final header followed by a newline still
+        # yields an (empty) section, so its heading is kept
+        if content_start <= len(resume_text):
+            sections[current_section.lower()] = resume_text[content_start:]
+            
+        return sections
     
     def combine_sections(self, sections: Dict[str, str]) -> str:
         """
-        Combine enhanced sections back into a complete resume.
+        Combine sections back into a complete resume.
+        
+        Every section is emitted exactly once, ordered by the first known
+        section name it contains.
         
         Parameters:
-            sections (Dict[str, str]): Enhanced sections
+            sections (Dict[str, str]): Resume sections
             
         Returns:
             str: Complete resume in markdown format
         """
         # Define section order
         section_order = [
-            'summary', 'experience', 'skills', 'education', 'certifications',
+            'contact', 'summary', 'experience', 'skills', 'education', 'certifications',
             'projects', 'publications', 'awards', 'languages', 'interests'
         ]
         
-        # Combine sections in order
-        resume_parts = []
-        for section in section_order:
-            for name, content in sections.items():
-                if section in name.lower():
-                    resume_parts.append(f"# {name.title()}\n\n{content.strip()}\n")
-                    break
-        
-        # Add any remaining sections not in the predefined order
+        # Bucket each section under the first ordered name it contains;
+        # unmatched sections go last, keeping their original order
+        buckets: Dict[int, List[str]] = {}
         for name, content in sections.items():
-            if not any(section in name.lower() for section in section_order):
-                resume_parts.append(f"# {name.title()}\n\n{content.strip()}\n")
+            name_lower = name.lower()
+            index = next(
+                (i for i, section in enumerate(section_order) if section in name_lower),
+                len(section_order)
+            )
+            buckets.setdefault(index, []).append(f"# {name.title()}\n\n{content.strip()}\n")
+        
+        resume_parts = [part for index in sorted(buckets) for part in buckets[index]]
         
         return '\n'.join(resume_parts) 
\ No newline at end of file
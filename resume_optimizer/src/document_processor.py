@@ -1,10 +1,97 @@
 import os
-from typing import Dict, BinaryIO
+import io
+import hashlib
+import multiprocessing
+import zipfile
+import tempfile
+import threading
+from contextlib import contextmanager
+from xml.etree import ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, BinaryIO, Iterator, List, Optional
 from docx import Document
-from pdfminer.high_level import extract_text
-from markdown2 import markdown
-from weasyprint import HTML
+import pypdfium2 as pdfium
+from markdown_it import MarkdownIt
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
 from jinja2 import Environment, FileSystemLoader
+from .profiling import profiled
+
+_MD = MarkdownIt('commonmark', {'html': True}).enable('table')
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# Run-level elements that map to whitespace, as in python-docx's paragraph.text
+_DOCX_SPECIAL_TEXT = {_W_NS + 'tab': '\t', _W_NS + 'br': '\n', _W_NS + 'cr': '\n'}
+
+# Subtrees that never hold paragraph text (tab stop definitions, formatting)
+# or duplicate it (legacy fallback copies of text boxes)
+_DOCX_SKIPPED = {_W_NS + 'pPr', _W_NS + 'rPr', _MC_FALLBACK}
+
+# Upper bound on characters read from plain-text uploads
+MAX_TEXT_CHARS = 1_000_000
+
+# Number of rendered PDFs kept in memory for repeated previews
+PDF_CACHE_SIZE = 16
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """
+    Open a temporary file next to path for binary writing, then move it into place.
+    
+    If the block raises, the temporary file is removed and path is left untouched,
+    so a failed render never leaves a truncated file behind.
+    
+    Parameters:
+        path (str): Final location of the file
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            yield temp_file
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def _iter_docx_paragraphs(element: ET.Element):
+    """Yield every w:p in document order, including text-box paragraphs, exactly once"""
+    for child in element:
+        if child.tag in _DOCX_SKIPPED:
+            continue
+        if child.tag == _W_NS + 'p':
+            yield child
+        yield from _iter_docx_paragraphs(child)
+
+def _docx_paragraph_text(element: ET.Element) -> str:
+    """Text of a paragraph's own runs; nested (text-box) paragraphs are left out"""
+    parts = []
+    for child in element:
+        if child.tag in _DOCX_SKIPPED or child.tag == _W_NS + 'p':
+            continue
+        if child.tag == _W_NS + 't':
+            parts.append(child.text or '')
+        elif child.tag in _DOCX_SPECIAL_TEXT:
+            parts.append(_DOCX_SPECIAL_TEXT[child.tag])
+        else:
+            parts.append(_docx_paragraph_text(child))
+    return ''.join(parts)
+
+@lru_cache(maxsize=32)
+def _load_stylesheet(css_file: str, mtime: float, font_config: FontConfiguration) -> CSS:
+    """
+    Parse a stylesheet once per file version and font configuration.
+    
+    mtime is part of the cache key. Since font configurations are per thread,
+    each render thread gets its own CSS object.
+    """
+    return CSS(filename=css_file, font_config=font_config)
 
 class DocumentProcessor:
     def __init__(self, templates_dir: str = "templates"):
@@ -14,7 +101,22 @@ class DocumentProcessor:
         Parameters:
             templates_dir (str): Directory containing HTML templates
         """
+        self.templates_dir = templates_dir
         self.env = Environment(loader=FileSystemLoader(templates_dir))
+        self._template = self.env.get_template('resume.html')
+        # WeasyPrint's font configuration wraps fontconfig/Pango state that is not
+        # safe to share between threads, so each render thread gets its own
+        self._thread_local = threading.local()
+        self._pdf_cache: OrderedDict = OrderedDict()
+        self._pdf_cache_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._handlers = {
+            '.pdf': self.extract_from_pdf,
+            '.docx': self.extract_from_docx,
+            '.doc': self.extract_from_docx,
+            '.txt': self.extract_from_text
+        }
         
     def extract_from_pdf(self, file_obj: BinaryIO) -> str:
         """
@@ -26,33 +128,72 @@ class DocumentProcessor:
         Returns:
             str: Extracted text content
         """
-        return extract_text(file_obj)
+        pdf = pdfium.PdfDocument(file_obj)
+        try:
+            pages_text = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    pages_text.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                    page.close()
+            return '\n'.join(pages_text)
+        finally:
+            pdf.close()
     
     def extract_from_docx(self, file_obj: BinaryIO) -> str:
         """
         Extract text content from a Word document.
         
+        The paragraph text is read directly from word/document.xml; the full
+        python-docx object model is only built if that fails. Tabs and line
+        breaks are kept, and text-box paragraphs are included once each.
+        
         Parameters:
             file_obj (BinaryIO): Word document file object
             
         Returns:
             str: Extracted text content
         """
-        doc = Document(file_obj)
-        return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+        try:
+            with zipfile.ZipFile(file_obj) as archive:
+                root = ET.fromstring(archive.read('word/document.xml'))
+        except (zipfile.BadZipFile, KeyError, ET.ParseError):
+            file_obj.seek(0)
+            doc = Document(file_obj)
+            return '\n'.join(paragraph.text for paragraph in doc.paragraphs if paragraph.text)
+        
+        paragraphs = (_docx_paragraph_text(paragraph) for paragraph in _iter_docx_paragraphs(root))
+        return '\n'.join(text for text in paragraphs if text)
     
     def extract_from_text(self, file_obj: BinaryIO) -> str:
         """
         Extract content from a text file.
         
+        The file is decoded incrementally; invalid UTF-8 sequences are replaced.
+        
         Parameters:
             file_obj (BinaryIO): Text file object
             
         Returns:
             str: File content
+            
+        Raises:
+            ValueError: If the file is longer than MAX_TEXT_CHARS characters
         """
-        return file_obj.read().decode('utf-8')
+        reader = io.TextIOWrapper(file_obj, encoding='utf-8', errors='replace')
+        try:
+            content = reader.read(MAX_TEXT_CHARS + 1)
+        finally:
+            # Detach so the caller's file object is not closed with the wrapper
+            reader.detach()
+        
+        if len(content) > MAX_TEXT_CHARS:
+            raise ValueError(f"Text file too large: limit is {MAX_TEXT_CHARS} characters")
+        return content
     
+    @profiled
     def process_upload(self, file_obj: BinaryIO) -> str:
         """
         Process uploaded resume files.
@@ -63,16 +204,12 @@ class DocumentProcessor:
         Returns:
             str: Extracted text content
         """
-        filename = file_obj.name.lower()
+        extension = os.path.splitext(file_obj.name)[1].lower()
         
-        if filename.endswith('.pdf'):
-            return self.extract_from_pdf(file_obj)
-        elif filename.endswith(('.docx', '.doc')):
-            return self.extract_from_docx(file_obj)
-        elif filename.endswith('.txt'):
-            return self.extract_from_text(file_obj)
-        else:
-            raise ValueError(f"Unsupported file format: {filename.split('.')[-1]}")
+        handler = self._handlers.get(extension)
+        if handler is None:
+            raise ValueError(f"Unsupported file format: {extension.lstrip('.') or file_obj.name}")
+        return handler(file_obj)
     
     def markdown_to_html(self, content: str) -> str:
         """
@@ -84,45 +221,142 @@ class DocumentProcessor:
         Returns:
             str: HTML content
         """
-        return markdown(content)
+        return _MD.render(content)
+    
+    def _get_font_config(self) -> FontConfiguration:
+        """Return this thread's FontConfiguration, creating it on first use"""
+        font_config = getattr(self._thread_local, 'font_config', None)
+        if font_config is None:
+            font_config = self._thread_local.font_config = FontConfiguration()
+        return font_config
     
-    def html_to_pdf(self, html_content: str, css_file: str = None) -> bytes:
+    def html_to_pdf(self, html_content: str, css_file: str = None, target: Optional[BinaryIO] = None) -> Optional[bytes]:
         """
         Convert HTML content to PDF.
         
+        When a target is given, the PDF is streamed straight into it instead
+        of being returned as bytes. PDFs returned as bytes are memoized, and
+        a memoized copy is reused for either kind of call.
+        
         Parameters:
             html_content (str): HTML content to convert
             css_file (str, optional): Path to CSS file for styling
+            target (BinaryIO, optional): Writable binary file to receive the PDF
             
         Returns:
-            bytes: PDF content
+            Optional[bytes]: PDF content, or None if it was written to target
         """
-        # Load template and render HTML
-        template = self.env.get_template('resume.html')
-        rendered_html = template.render(content=html_content)
+        # Render HTML from the template
+        rendered_html = self._template.render(content=html_content)
+        font_config = self._get_font_config()
         
-        # Convert to PDF
-        html = HTML(string=rendered_html)
+        stylesheets = []
         if css_file and os.path.exists(css_file):
-            return html.write_pdf(stylesheets=[css_file])
-        return html.write_pdf()
+            mtime = os.path.getmtime(css_file)
+            stylesheets.append(_load_stylesheet(css_file, mtime, font_config))
+        
+        key = hashlib.md5(
+            f"{rendered_html}\0{[css_file, mtime] if stylesheets else None}".encode('utf-8')
+        ).hexdigest()
+        with self._pdf_cache_lock:
+            pdf_content = self._pdf_cache.get(key)
+            if pdf_content is not None:
+                self._pdf_cache.move_to_end(key)
+        
+        if pdf_content is not None:
+            if target is None:
+                return pdf_content
+            target.write(pdf_content)
+            return None
+        
+        # Convert to PDF; with a target, WeasyPrint writes into it directly
+        # and the result is not memoized, so no full copy is held in memory
+        pdf_content = HTML(string=rendered_html).write_pdf(
+            target=target,
+            stylesheets=stylesheets,
+            font_config=font_config
+        )
+        if target is not None:
+            return None
+        
+        with self._pdf_cache_lock:
+            self._pdf_cache[key] = pdf_content
+            if len(self._pdf_cache) > PDF_CACHE_SIZE:
+                self._pdf_cache.popitem(last=False)
+        
+        return pdf_content
     
-    def convert_to_formats(self, content: str, css_file: str = None) -> Dict[str, str]:
+    @profiled
+    def convert_to_formats(self, content: str, css_file: str = None, pdf_target: Optional[BinaryIO] = None) -> Dict[str, str]:
         """
         Convert optimized content to various formats.
         
         Parameters:
             content (str): Original content in markdown format
             css_file (str, optional): Path to CSS file for styling
+            pdf_target (BinaryIO, optional): Writable binary file to write the PDF into
             
         Returns:
-            Dict[str, str]: Dictionary containing different format versions
+            Dict[str, str]: Dictionary containing different format versions;
+            'pdf' is None when the PDF was written to pdf_target
         """
         html_content = self.markdown_to_html(content)
-        pdf_content = self.html_to_pdf(html_content, css_file)
+        pdf_content = self.html_to_pdf(html_content, css_file, target=pdf_target)
         
         return {
             'markdown': content,
             'html': html_content,
             'pdf': pdf_content
-        } 
\ No newline at end of file
+        }
+    
+    @profiled
+    def convert_many(self, contents: List[str], pdf_paths: List[str], css_file: str = None) -> List[Dict[str, str]]:
+        """
+        Convert several resumes at once, rendering them in parallel processes.
+        
+        PDF rendering is CPU-bound, so independent documents are spread across
+        a process pool instead of being converted one after another. The pool
+        is created on first use and reused until close() is called.
+        
+        Parameters:
+            contents (List[str]): Resumes in markdown format
+            pdf_paths (List[str]): Where to write each resume's PDF
+            css_file (str, optional): Path to CSS file for styling
+            
+        Returns:
+            List[Dict[str, str]]: Format versions for each resume, in input order
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                # Workers are spawned rather than forked: forking a process that
+                # already runs server threads and has Pango/fontconfig loaded can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            pool = self._pool
+        
+        futures = [
+            pool.submit(_convert_in_worker, self.templates_dir, content, css_file, pdf_path)
+            for content, pdf_path in zip(contents, pdf_paths)
+        ]
+        return [future.result() for future in futures]
+    
+    def close(self):
+        """Shut down the worker process pool used by convert_many, if any"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+# Per-process DocumentProcessor used by convert_many workers
+_worker_processor: Optional[DocumentProcessor] = None
+
+def _convert_in_worker(templates_dir: str, content: str, css_file: Optional[str], pdf_path: str) -> Dict[str, str]:
+    """Convert one resume inside a worker process, writing its PDF to pdf_path"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor(templates_dir)
+    with atomic_write(pdf_path) as pdf_file:
+        return _worker_processor.convert_to_formats(content, css_file, pdf_target=pdf_file)
@@ -1,11 +1,13 @@
 import gradio as gr
-from typing import Tuple, BinaryIO
+from typing import AsyncIterator, Tuple, BinaryIO, List
 import os
+import re
+import asyncio
 import tempfile
 from .ai_engine import ResumeOptimizer
-from .document_processor import DocumentProcessor
+from .document_processor import DocumentProcessor, atomic_write
 
-def create_interface(optimizer: ResumeOptimizer, processor: DocumentProcessor) -> gr.Interface:
+def create_interface(optimizer: ResumeOptimizer, processor: DocumentProcessor) -> gr.TabbedInterface:
     """
     Create the main interface for resume generation.
     
@@ -14,23 +16,78 @@ def create_interface(optimizer: ResumeOptimizer, processor: DocumentProcessor) -
         processor (DocumentProcessor): Instance of the document processor
         
     Returns:
-        gr.Interface: Gradio interface object
+        gr.TabbedInterface: Gradio interface with the tailoring and batch results tabs
     """
-    def optimize_resume(
+    async def render_outputs(tailored_contents: List[str]) -> Tuple[str, str, List[str]]:
+        """
+        Convert tailored resumes to markdown, HTML and PDF files.
+        
+        Parameters:
+            tailored_contents (List[str]): Tailored resumes in markdown
+            
+        Returns:
+            Tuple[str, str, List[str]]: Markdown preview, HTML view, and paths to PDF files
+        """
+        # Convert to different formats, writing PDFs to temporary files.
+        # PDF rendering is CPU-bound, so keep it off the event loop
+        temp_dir = tempfile.gettempdir()
+        if len(tailored_contents) == 1:
+            pdf_paths = [os.path.join(temp_dir, "optimized_resume.pdf")]
+            with atomic_write(pdf_paths[0]) as pdf_file:
+                all_outputs = [await asyncio.to_thread(
+                    processor.convert_to_formats,
+                    tailored_contents[0],
+                    css_file="templates/style.css",
+                    pdf_target=pdf_file
+                )]
+        else:
+            # Batch results are rendered in parallel across processes
+            pdf_paths = [
+                os.path.join(temp_dir, f"optimized_resume_{index + 1}.pdf")
+                for index in range(len(tailored_contents))
+            ]
+            all_outputs = await asyncio.to_thread(
+                processor.convert_many,
+                tailored_contents,
+                pdf_paths,
+                css_file="templates/style.css"
+            )
+        
+        markdown_parts = [outputs['markdown'] for outputs in all_outputs]
+        html_parts = [outputs['html'] for outputs in all_outputs]
+        
+        return (
+            '\n\n---\n\n'.join(markdown_parts),  # For preview
+            '<hr>'.join(html_parts),              # For web view
+            pdf_paths                             # Paths to PDF files
+        )
+
+    async def optimize_resume(
         resume_file: BinaryIO,
         job_description: str,
-        optimization_level: str
-    ) -> Tuple[str, str, str]:
+        optimization_level: str,
+        batch_mode: bool = False
+    ) -> AsyncIterator[Tuple[str, str, List[str]]]:
         """
         Generate a tailored resume from the uploaded base resume.
         
+        The markdown preview updates while the resume is being generated;
+        the HTML and PDF outputs are produced once it is complete.
+        
+        In batch mode, the job description box may hold several job descriptions
+        separated by a line containing only '---'. They are submitted together
+        through the OpenAI Batch API, which is cheaper but can take up to 24
+        hours, so only the batch ID is returned; the results are fetched from
+        the Batch Results tab.
+        
         Parameters:
             resume_file (BinaryIO): Uploaded resume file
             job_description (str): Job description text
             optimization_level (str): Level of optimization to apply
+            batch_mode (bool): Queue the request(s) through the Batch API
             
-        Returns:
-            Tuple[str, str, str]: Markdown preview, HTML view, and path to PDF file
+        Yields:
+            Tuple[str, str, List[str]]: Markdown preview, HTML view, and paths to PDF files
         """
         # Process the uploaded resume
         resume_text = processor.process_upload(resume_file)
@@ -42,33 +99,63 @@ def create_interface(optimizer: ResumeOptimizer, processor: DocumentProcessor) -
             "Aggressive": 0.5
         }.get(optimization_level, 0.4)
         
-        # Generate tailored resume
-        tailored_content = optimizer.generate_tailored_resume(
-            resume_text,
-            job_description,
-            temperature=temperature
-        )
+        if batch_mode:
+            job_descriptions = [
+                jd.strip() for jd in re.split(r'^\s*---\s*$', job_description, flags=re.MULTILINE)
+                if jd.strip()
+            ]
+            if not job_descriptions:
+                raise gr.Error("Please provide at least one job description.")
+            batch_id = await optimizer.submit_batch(
+                [(resume_text, jd) for jd in job_descriptions],
+                temperature=temperature
+            )
+            yield (
+                f"Batch submitted with ID `{batch_id}`. "
+                "Paste it into the Batch Results tab to fetch the tailored resumes once it has finished.",
+                "",
+                []
+            )
+            return
         
-        # Convert to different formats
-        outputs = processor.convert_to_formats(
-            tailored_content,
-            css_file="templates/style.css"
-        )
+        # Generate the tailored resume, updating the preview as it streams in
+        tailored_content = ''
+        try:
+            async for tailored_content in optimizer.stream_tailored_resume(
+                resume_text,
+                job_description,
+                temperature=temperature
+            ):
+                yield tailored_content, gr.skip(), gr.skip()
+        except RuntimeError as e:
+            raise gr.Error(str(e))
         
-        # Save PDF to a temporary file
-        temp_dir = tempfile.gettempdir()
-        pdf_path = os.path.join(temp_dir, "optimized_resume.pdf")
-        with open(pdf_path, "wb") as f:
-            f.write(outputs['pdf'])
+        yield await render_outputs([tailored_content])
+
+    async def fetch_batch(batch_id: str) -> Tuple[str, str, List[str]]:
+        """
+        Fetch the tailored resumes of a previously submitted batch.
         
-        return (
-            outputs['markdown'],  # For preview
-            outputs['html'],      # For web view
-            pdf_path             # Path to PDF file
-        )
+        Parameters:
+            batch_id (str): ID shown when the batch was submitted
+            
+        Returns:
+            Tuple[str, str, List[str]]: Markdown preview, HTML view, and paths to PDF files
+        """
+        batch_id = batch_id.strip()
+        if not batch_id:
+            raise gr.Error("Please provide a batch ID.")
+        try:
+            status, tailored_contents = await optimizer.get_batch_results(batch_id)
+        except RuntimeError as e:
+            raise gr.Error(str(e))
+        if tailored_contents is None:
+            return f"Batch `{batch_id}` is still {status}. Check again later.", "", []
+        
+        return await render_outputs(tailored_contents)
 
     # Create the interface layout
-    interface = gr.Interface(
+    tailor_interface = gr.Interface(
         fn=optimize_resume,
         inputs=[
             gr.File(
@@ -85,12 +172,17 @@ def create_interface(optimizer: ResumeOptimizer, processor: DocumentProcessor) -
                 label="Optimization Level",
                 value="Balanced",
                 info="Conservative: Minimal changes, Balanced: Moderate optimization, Aggressive: Extensive rewriting"
+            ),
+            gr.Checkbox(
+                label="Batch Mode",
+                value=False,
+                info="Submit through the OpenAI Batch API (cheaper, can take up to 24 hours) and fetch the results from the Batch Results tab. Separate multiple job descriptions with a '---' line."
             )
         ],
         outputs=[
             gr.Markdown(label="Preview Your Tailored Resume"),
             gr.HTML(label="Web Version"),
-            gr.File(label="Download Resume")
+            gr.File(label="Download Resume", file_count="multiple")
         ],
         title="AI Resume Tailoring System",
         description="""
@@ -105,4 +197,26 @@ def create_interface(optimizer: ResumeOptimizer, processor: DocumentProcessor) -
         allow_flagging="never"
     )
     
-    return interface 
\ No newline at end of file
+    results_interface = gr.Interface(
+        fn=fetch_batch,
+        inputs=[
+            gr.Textbox(
+                label="Batch ID",
+                placeholder="batch_..."
+            )
+        ],
+        outputs=[
+            gr.Markdown(label="Preview Your Tailored Resumes"),
+            gr.HTML(label="Web Version"),
+            gr.File(label="Download Resumes", file_count="multiple")
+        ],
+        title="Batch Results",
+        description="Fetch the tailored resumes of a batch submitted in Batch Mode.",
+        theme="default",
+        allow_flagging="never"
+    )
+    
+    return gr.TabbedInterface(
+        [tailor_interface, results_interface],
+        ["Tailor Resume", "Batch Results"]
+    ) 
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import threading
+import functools
+import inspect
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_write_lock = threading.Lock()
+
+@contextmanager
+def perf(name: str) -> Iterator[None]:
+    """
+    Record wall time, CPU time and peak memory for a block of code.
+
+    Each measurement is appended as one JSON line to the file named by the
+    PERF_LOG environment variable. When PERF_LOG is unset nothing is measured.
+    CPU time comes from getrusage and covers the whole process, so it also
+    includes any work running concurrently with the block.
+
+    Parameters:
+        name (str): Label for the measured block
+    """
+    log_path = os.getenv('PERF_LOG')
+    if not log_path:
+        yield
+        return
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = {
+            "name": name,
+            "timestamp": time.time(),
+            "wall_s": time.perf_counter() - start
+        }
+        if usage_before:
+            usage_after = resource.getrusage(resource.RUSAGE_SELF)
+            record.update(
+                user_cpu_s=usage_after.ru_utime - usage_before.ru_utime,
+                system_cpu_s=usage_after.ru_stime - usage_before.ru_stime,
+                max_rss_kb=usage_after.ru_maxrss
+            )
+        with _write_lock, open(log_path, 'a') as log_file:
+            log_file.write(json.dumps(record) + '\n')
+
+def profiled(func: Callable) -> Callable:
+    """
+    Decorate a function, coroutine function or async generator function so
+    each call is measured by perf.
+
+    Parameters:
+        func (Callable): Function to measure, labelled by its qualified name
+
+    Returns:
+        Callable: The wrapped function
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with perf(func.__qualname__):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def async_gen_wrapper(*args, **kwargs):
+            with perf(func.__qualname__):
+                async for item in func(*args, **kwargs):
+                    yield item
+        return async_gen_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with perf(func.__qualname__):
+            return func(*args, **kwargs)
+    return wrapper